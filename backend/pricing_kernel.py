@@ -0,0 +1,34 @@
+import math
+
+import numpy as np
+from numba import njit, prange
+
+from utils_geo import EARTH_RADIUS_KM
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def batch_estimate(lats, lons, qidx, widx, lat0, lon0,
+                   volume_factors, surcharges, rate_per_km, base_rate):
+    """Distances (km) from (lat0, lon0) and estimated costs for a batch of pickups.
+
+    qidx/widx index into volume_factors/surcharges, which are ordered like the
+    Quantity and WasteType enums. Mirrors calculate_cost for each element.
+    """
+    n = lats.shape[0]
+    distances = np.empty(n)
+    costs = np.empty(n)
+    lat0_rad = math.radians(lat0)
+    lon0_rad = math.radians(lon0)
+    cos_lat0 = math.cos(lat0_rad)
+
+    for i in prange(n):
+        lat_rad = math.radians(lats[i])
+        dlat = lat_rad - lat0_rad
+        dlon = math.radians(lons[i]) - lon0_rad
+        a = math.sin(dlat * 0.5)**2 + cos_lat0 * math.cos(lat_rad) * math.sin(dlon * 0.5)**2
+        d = 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+        distances[i] = d
+        costs[i] = ((d * rate_per_km) + (volume_factors[qidx[i]] * base_rate)) * surcharges[widx[i]]
+
+    return distances, costs
@@ -1,18 +1,35 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, File, Query, UploadFile, status
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorGridFSBucket
+from bson import ObjectId
+from gridfs.errors import NoFile
+from pymongo import ReturnDocument
+import asyncio
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, TypeAdapter, model_validator, validator
 from typing import List, Optional, Dict, Any
 import uuid
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
+import base64
+import binascii
+import hashlib
+import hmac
 import math
+import threading
+import time
+import h3
 import jwt
+import numpy as np
+from cachetools import TTLCache
 from enum import Enum
+from utils_geo import EARTH_RADIUS_KM, haversine_vec
+from pricing_kernel import batch_estimate
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -21,6 +38,7 @@ load_dotenv(ROOT_DIR / '.env')
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ.get('DB_NAME', 'ecoport_db')]
+images = AsyncIOMotorGridFSBucket(db)
 
 # Environment variables with defaults
 JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'ecoport_secret_key_2024')
@@ -28,6 +46,16 @@ SERVICE_CENTER_LAT = float(os.environ.get('SERVICE_CENTER_LAT', '26.7271'))
 SERVICE_CENTER_LNG = float(os.environ.get('SERVICE_CENTER_LNG', '88.3953'))
 SERVICE_RADIUS_KM = float(os.environ.get('SERVICE_RADIUS_KM', '20'))
 
+# Precomputed service center terms for the distance helpers
+CENTER_LAT_RAD = math.radians(SERVICE_CENTER_LAT)
+CENTER_LNG_RAD = math.radians(SERVICE_CENTER_LNG)
+COS_CENTER = math.cos(CENTER_LAT_RAD)
+KM_PER_DEGREE = 111.32
+
+# H3 resolution (~460 m cells) and neighbour ring used for proximity lookups
+H3_RESOLUTION = 8
+H3_SEARCH_RING = 3
+
 # Pricing constants
 RATE_PER_KM = 10
 BASE_RATE = 50
@@ -49,14 +77,38 @@ WASTE_SURCHARGES = {
     'Mixed': 1.1
 }
 
+# Waste photo upload limit
+MAX_IMAGE_BYTES = 2 * 1024 * 1024
+IMAGE_CHUNK_SIZE = 256 * 1024
+
+# Photo types we accept and serve; anything else could be rendered as active content
+ALLOWED_IMAGE_TYPES = ('image/jpeg', 'image/png', 'image/webp')
+IMAGE_RESPONSE_HEADERS = {'X-Content-Type-Options': 'nosniff', 'Content-Disposition': 'inline'}
+
+# Most recent pickups included in the pricing stats
+PRICING_STATS_MAX_REQUESTS = 100_000
+# The parallel kernel must not run on two threads at once: Numba's workqueue layer aborts the process
+_PRICING_KERNEL_LOCK = threading.Lock()
+
 # Hardcoded admin credentials for pilot
 ADMIN_CREDENTIALS = {
     'username': 'admin',
     'password': 'admin123'
 }
 
+# Reusable JWT codec with the signing key pre-encoded, so per-request calls skip key coercion
+_JWT = jwt.PyJWT()
+_JWT_KEY = JWT_SECRET_KEY.encode()
+_JWT_ALGORITHMS = ['HS256']
+
+# Verified JWT payloads, keyed by a hash of the token so raw credentials are never retained
+_JWT_CACHE = TTLCache(maxsize=10_000, ttl=30)
+
+# Admin token reused across logins until it gets within an hour of expiry
+_ADMIN_TOKEN_CACHE = {'token': None, 'exp': 0}
+
 # Create the main app
-app = FastAPI(title="EcoPort API", version="1.0.0")
+app = FastAPI(title="EcoPort API", version="1.0.0", default_response_class=ORJSONResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -95,6 +147,23 @@ class DriverStatus(str, Enum):
     BUSY = "Busy"
     OFFLINE = "Offline"
 
+# Plain string values for Mongo queries and updates
+_S_PENDING, _S_APPROVED, _S_ASSIGNED, _S_COMPLETED = (s.value for s in PickupStatus)
+_D_AVAILABLE, _D_BUSY, _D_OFFLINE = (s.value for s in DriverStatus)
+
+VALID_TRANSITIONS = {
+    _S_PENDING: (_S_APPROVED,),
+    _S_APPROVED: (_S_ASSIGNED,),
+    _S_ASSIGNED: (_S_COMPLETED,),
+    _S_COMPLETED: ()
+}
+
+# Pricing factors ordered like the enums, for the batch pricing kernel
+_QUANTITY_INDEX = {q.value: i for i, q in enumerate(Quantity)}
+_WASTE_TYPE_INDEX = {w.value: i for i, w in enumerate(WasteType)}
+_VOLUME_FACTOR_ARRAY = np.array([VOLUME_FACTORS[q.value] for q in Quantity])
+_WASTE_SURCHARGE_ARRAY = np.array([WASTE_SURCHARGES[w.value] for w in WasteType])
+
 class PaymentStatus(str, Enum):
     PENDING = "Pending"
     PAID = "Paid"
@@ -111,20 +180,23 @@ class Location(BaseModel):
     longitude: float
     address: str = ""
 
-class StatusHistoryEntry(BaseModel):
+# History entries are only built server-side, so plain dataclasses are enough
+@dataclass(slots=True)
+class StatusHistoryEntry:
     status: str
-    at: datetime = Field(default_factory=datetime.utcnow)
+    at: datetime = field(default_factory=datetime.utcnow)
     by: str = "system"
 
-class PriceHistoryEntry(BaseModel):
+@dataclass(slots=True)
+class PriceHistoryEntry:
     actual_cost: float
-    at: datetime = Field(default_factory=datetime.utcnow)
+    at: datetime = field(default_factory=datetime.utcnow)
     by: str = "admin"
 
-class PickupRequest(BaseModel):
+class PickupRequestSummary(BaseModel):
+    """Pickup request as returned by list endpoints (no image, recent history only)"""
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     location: Location
-    waste_image: str  # base64 string
     waste_type: WasteType
     quantity: Quantity
     estimated_cost: float
@@ -141,21 +213,25 @@ class PickupRequest(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
+class PickupRequest(PickupRequestSummary):
+    waste_image_id: Optional[str] = None  # GridFS file id
+
+class PickupRequestDetail(PickupRequest):
+    has_image: bool = False  # also true for older requests that carry the photo inline
+
 class PickupRequestCreate(BaseModel):
     location: Location
-    waste_image: str
+    waste_image_id: str
     waste_type: WasteType
     quantity: Quantity
     user_contact: Optional[str] = None
     notes: Optional[str] = None
     payment_method: Optional[PaymentMethod] = None
 
-    @validator('waste_image')
-    def validate_image_size(cls, v):
-        # Check base64 size (2MB limit ~ 2.67MB base64)
-        max_size = 2.67 * 1024 * 1024  # ~2MB in base64
-        if len(v) > max_size:
-            raise ValueError('Image too large. Maximum size is 2MB.')
+    @validator('waste_image_id')
+    def validate_image_id(cls, v):
+        if not ObjectId.is_valid(v):
+            raise ValueError('Invalid image id.')
         return v
 
 class PickupRequestUpdate(BaseModel):
@@ -164,6 +240,26 @@ class PickupRequestUpdate(BaseModel):
     notes: Optional[str] = None
     payment_status: Optional[PaymentStatus] = None
 
+class WorkflowTransition(BaseModel):
+    status: Optional[PickupStatus] = None
+    assign_driver: Optional[str] = None
+
+    @validator('assign_driver')
+    def validate_driver_id(cls, v):
+        if v is not None and not v.strip():
+            raise ValueError('assign_driver must be a driver id.')
+        return v
+
+    # Runs only once both fields parsed, so a bad status isn't also reported as a missing action
+    @model_validator(mode='after')
+    def validate_single_action(self):
+        if (self.assign_driver is None) == (self.status is None):
+            raise ValueError('Each transition must set exactly one of status or assign_driver.')
+        return self
+
+class WorkflowRequest(BaseModel):
+    transitions: List[WorkflowTransition] = Field(min_length=1)
+
 class Driver(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
@@ -174,11 +270,15 @@ class Driver(BaseModel):
     current_location: Optional[Location] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class NearbyDriver(Driver):
+    distance_km: float
+
 class DriverCreate(BaseModel):
     name: str
     phone: str
     vehicle_type: str
     vehicle_number: str
+    current_location: Optional[Location] = None
 
 class Rating(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -204,20 +304,53 @@ class AdminUser(BaseModel):
     username: str
     role: str = "admin"
 
+# List views skip the base64 image and only carry the latest history entries
+PICKUP_SUMMARY_PROJECTION = {
+    '_id': 0,
+    'h3_r8': 0,
+    'waste_image': 0,
+    'waste_image_id': 0,
+    'status_history': {'$slice': -3},
+    'price_history': {'$slice': -3}
+}
+
+# Stored pickup documents minus internal fields, ready to be returned as-is
+PICKUP_DETAIL_PROJECTION = {'_id': 0, 'h3_r8': 0, 'waste_image': 0}
+
+# Validate and serialize list responses in one pass instead of per item
+_DRIVER_LIST_ADAPTER = TypeAdapter(List[Driver])
+
 # ============ UTILITIES ============
-def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """Calculate distance between two points in km using Haversine formula"""
-    R = 6371  # Earth's radius in km
-    
-    lat1_rad = math.radians(lat1)
-    lat2_rad = math.radians(lat2)
-    delta_lat = math.radians(lat2 - lat1)
-    delta_lon = math.radians(lon2 - lon1)
-    
-    a = math.sin(delta_lat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon/2)**2
+def fast_distance_km(lat: float, lon: float) -> float:
+    """Approximate distance from the service center in km (equirectangular projection)"""
+    dx = (lon - SERVICE_CENTER_LNG) * COS_CENTER
+    dy = lat - SERVICE_CENTER_LAT
+    return KM_PER_DEGREE * math.hypot(dx, dy)
+
+def haversine_from_center(lat: float, lon: float) -> float:
+    """Haversine distance in km from the service center"""
+    lat_rad = math.radians(lat)
+    delta_lat = lat_rad - CENTER_LAT_RAD
+    delta_lon = math.radians(lon) - CENTER_LNG_RAD
+    
+    a = math.sin(delta_lat/2)**2 + COS_CENTER * math.cos(lat_rad) * math.sin(delta_lon/2)**2
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
     
-    return R * c
+    return EARTH_RADIUS_KM * c
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Media type of an allowed image format from its leading bytes, None otherwise"""
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+def h3_cell(location: Location) -> str:
+    """H3 cell index of a location at the proximity-lookup resolution"""
+    return h3.latlng_to_cell(location.latitude, location.longitude, H3_RESOLUTION)
 
 def calculate_cost(distance_km: float, quantity: str, waste_type: str) -> float:
     """Calculate estimated cost based on distance, quantity, and waste type"""
@@ -232,14 +365,22 @@ def create_jwt_token(username: str) -> str:
     payload = {
         'sub': username,
         'role': 'admin',
-        'exp': datetime.utcnow().timestamp() + 86400  # 24 hours
+        'exp': int(time.time()) + 86400  # 24 hours
     }
-    return jwt.encode(payload, JWT_SECRET_KEY, algorithm='HS256')
+    return _JWT.encode(payload, _JWT_KEY, algorithm=_JWT_ALGORITHMS[0])
 
 def verify_jwt_token(token: str) -> Optional[Dict]:
     """Verify JWT token"""
+    key = hashlib.sha256(token.encode()).hexdigest()[:32]
+    payload = _JWT_CACHE.get(key)
+    if payload is not None:
+        if payload['exp'] > time.time():
+            return payload
+        _JWT_CACHE.pop(key, None)
+        return None
     try:
-        payload = jwt.decode(token, JWT_SECRET_KEY, algorithms=['HS256'])
+        payload = _JWT.decode(token, _JWT_KEY, algorithms=_JWT_ALGORITHMS)
+        _JWT_CACHE[key] = payload
         return payload
     except jwt.ExpiredSignatureError:
         return None
@@ -258,9 +399,14 @@ async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(
 @api_router.post("/auth/login", response_model=LoginResponse)
 async def login(request: LoginRequest):
     """Admin login endpoint"""
-    if request.username == ADMIN_CREDENTIALS['username'] and request.password == ADMIN_CREDENTIALS['password']:
-        token = create_jwt_token(request.username)
-        return LoginResponse(access_token=token)
+    username_ok = hmac.compare_digest(request.username.encode(), ADMIN_CREDENTIALS['username'].encode())
+    password_ok = hmac.compare_digest(request.password.encode(), ADMIN_CREDENTIALS['password'].encode())
+    if username_ok and password_ok:
+        now = time.time()
+        if _ADMIN_TOKEN_CACHE['exp'] - now <= 3600:
+            _ADMIN_TOKEN_CACHE['token'] = create_jwt_token(request.username)
+            _ADMIN_TOKEN_CACHE['exp'] = now + 86400
+        return LoginResponse(access_token=_ADMIN_TOKEN_CACHE['token'])
     raise HTTPException(status_code=401, detail="Invalid credentials")
 
 @api_router.get("/auth/me", response_model=AdminUser)
@@ -272,26 +418,26 @@ async def get_me(admin: AdminUser = Depends(get_current_admin)):
 @api_router.post("/pickup-requests", response_model=PickupRequest)
 async def create_pickup_request(request: PickupRequestCreate):
     """Create a new pickup request"""
-    # Calculate distance from service center
-    distance_km = haversine_distance(
-        SERVICE_CENTER_LAT, SERVICE_CENTER_LNG,
-        request.location.latitude, request.location.longitude
-    )
-    
     # Check service area
-    if distance_km > SERVICE_RADIUS_KM:
+    if fast_distance_km(request.location.latitude, request.location.longitude) > SERVICE_RADIUS_KM:
         raise HTTPException(
             status_code=400,
             detail="Currently we serve Siliguri city limits only. Your location is outside our service area."
         )
     
+    if not await images.find({'_id': ObjectId(request.waste_image_id)}, limit=1).to_list(1):
+        raise HTTPException(status_code=400, detail="Image not found. Upload the photo first.")
+    
+    # Calculate distance from service center
+    distance_km = haversine_from_center(request.location.latitude, request.location.longitude)
+    
     # Calculate estimated cost
     estimated_cost = calculate_cost(distance_km, request.quantity.value, request.waste_type.value)
     
     # Create pickup request
     pickup = PickupRequest(
         location=request.location,
-        waste_image=request.waste_image,
+        waste_image_id=request.waste_image_id,
         waste_type=request.waste_type,
         quantity=request.quantity,
         estimated_cost=estimated_cost,
@@ -299,14 +445,45 @@ async def create_pickup_request(request: PickupRequestCreate):
         user_contact=request.user_contact,
         notes=request.notes,
         payment_method=request.payment_method,
-        status_history=[StatusHistoryEntry(status=PickupStatus.PENDING.value, by="user")]
+        status_history=[StatusHistoryEntry(status=_S_PENDING, by="user")]
     )
     
-    await db.pickup_requests.insert_one(pickup.dict())
+    doc = pickup.dict()
+    doc['h3_r8'] = h3_cell(pickup.location)
+    await db.pickup_requests.insert_one(doc)
     logger.info(f"Created pickup request: {pickup.id}")
     return pickup
 
-@api_router.get("/pickup-requests", response_model=List[PickupRequest])
+@api_router.post("/pickup-requests/image")
+async def upload_pickup_image(file: UploadFile = File(...)):
+    """Upload a waste photo and return its id for use in a pickup request"""
+    # Trust the file's signature, not the client-supplied content type
+    chunk = await file.read(IMAGE_CHUNK_SIZE)
+    content_type = sniff_image_type(chunk)
+    if not content_type:
+        raise HTTPException(status_code=400, detail="Only JPEG, PNG and WebP images are supported.")
+    
+    upload = images.open_upload_stream(
+        file.filename or 'waste-image',
+        metadata={'contentType': content_type}
+    )
+    size = 0
+    try:
+        while chunk:
+            size += len(chunk)
+            if size > MAX_IMAGE_BYTES:
+                raise HTTPException(status_code=400, detail="Image too large. Maximum size is 2MB.")
+            await upload.write(chunk)
+            chunk = await file.read(IMAGE_CHUNK_SIZE)
+        await upload.close()
+    except BaseException:
+        # Don't leave orphaned chunks behind
+        await upload.abort()
+        raise
+    
+    return {'file_id': str(upload._id)}
+
+@api_router.get("/pickup-requests", response_model=List[PickupRequestSummary])
 async def get_pickup_requests(
     status: Optional[PickupStatus] = None,
     limit: int = 50,
@@ -317,94 +494,124 @@ async def get_pickup_requests(
     if status:
         query['status'] = status.value
     
-    cursor = db.pickup_requests.find(query).sort('created_at', -1).skip(skip).limit(limit)
+    cursor = db.pickup_requests.find(query, PICKUP_SUMMARY_PROJECTION).sort('created_at', -1).skip(skip).limit(limit)
     requests = await cursor.to_list(limit)
-    return [PickupRequest(**req) for req in requests]
+    # Stored documents already match the response shape, so skip re-validation
+    return ORJSONResponse(requests)
 
-@api_router.get("/pickup-requests/{request_id}", response_model=PickupRequest)
+@api_router.get("/pickup-requests/{request_id}", response_model=PickupRequestDetail)
 async def get_pickup_request(request_id: str):
     """Get a specific pickup request"""
-    request = await db.pickup_requests.find_one({'id': request_id})
+    request = await db.pickup_requests.find_one({'id': request_id}, PICKUP_DETAIL_PROJECTION)
     if not request:
         raise HTTPException(status_code=404, detail="Pickup request not found")
-    return PickupRequest(**request)
+    # Older requests have no file id; check for an inline photo without loading it
+    request['has_image'] = bool(request.get('waste_image_id')) or await db.pickup_requests.count_documents(
+        {'id': request_id, 'waste_image': {'$nin': [None, '']}}, limit=1
+    ) > 0
+    return ORJSONResponse(request)
+
+@api_router.get("/pickup-requests/{request_id}/image")
+async def get_pickup_image(request_id: str):
+    """Stream the waste photo of a pickup request"""
+    request = await db.pickup_requests.find_one(
+        {'id': request_id},
+        {'waste_image_id': 1, 'waste_image': 1}
+    )
+    if not request:
+        raise HTTPException(status_code=404, detail="Pickup request not found")
+    
+    # Requests created before GridFS storage carry the image inline as a data URI
+    if request.get('waste_image') and not request.get('waste_image_id'):
+        data = request['waste_image']
+        media_type = 'image/jpeg'
+        if data.startswith('data:'):
+            header, _, data = data.partition(',')
+            media_type = header[len('data:'):].split(';')[0]
+        if media_type not in ALLOWED_IMAGE_TYPES:
+            media_type = 'image/jpeg'
+        try:
+            # Clients often dropped the base64 padding
+            content = base64.b64decode(data + '=' * (-len(data) % 4))
+        except binascii.Error:
+            raise HTTPException(status_code=404, detail="Image not found")
+        return Response(content=content, media_type=media_type, headers=IMAGE_RESPONSE_HEADERS)
+    
+    if not request.get('waste_image_id'):
+        raise HTTPException(status_code=404, detail="Image not found")
+    try:
+        download = await images.open_download_stream(ObjectId(request['waste_image_id']))
+    except NoFile:
+        raise HTTPException(status_code=404, detail="Image not found")
+    
+    async def iter_chunks():
+        while chunk := await download.readchunk():
+            yield chunk
+    
+    media_type = (download.metadata or {}).get('contentType')
+    if media_type not in ALLOWED_IMAGE_TYPES:
+        media_type = 'image/jpeg'
+    return StreamingResponse(iter_chunks(), media_type=media_type, headers=IMAGE_RESPONSE_HEADERS)
 
-@api_router.put("/pickup-requests/{request_id}", response_model=PickupRequest)
-async def update_pickup_request(
-    request_id: str,
-    update: PickupRequestUpdate,
-    admin: AdminUser = Depends(get_current_admin)
-):
-    """Update a pickup request (admin only)"""
+async def apply_pickup_update(request_id: str, update: PickupRequestUpdate, admin: AdminUser) -> Dict:
+    """Validate and apply an admin update, returning the updated document"""
     existing = await db.pickup_requests.find_one({'id': request_id})
     if not existing:
         raise HTTPException(status_code=404, detail="Pickup request not found")
     
-    pickup = PickupRequest(**existing)
     update_data = update.dict(exclude_unset=True)
+    # History entries are appended server-side instead of rewriting the whole list
+    push = {}
     
     # Validate status transitions
     if 'status' in update_data:
-        new_status = update_data['status']
-        current_status = pickup.status
-        
-        valid_transitions = {
-            PickupStatus.PENDING: [PickupStatus.APPROVED],
-            PickupStatus.APPROVED: [PickupStatus.ASSIGNED],
-            PickupStatus.ASSIGNED: [PickupStatus.COMPLETED],
-            PickupStatus.COMPLETED: []
-        }
+        new_status = update_data['status'].value
+        current_status = existing['status']
         
-        if new_status not in valid_transitions.get(current_status, []):
+        if new_status not in VALID_TRANSITIONS.get(current_status, ()):
             raise HTTPException(
                 status_code=400,
-                detail=f"Invalid status transition from {current_status.value} to {new_status.value}"
+                detail=f"Invalid status transition from {current_status} to {new_status}"
             )
         
-        # Add to status history - convert existing entries to dicts if needed
-        existing_history = [
-            h.dict() if hasattr(h, 'dict') else h 
-            for h in pickup.status_history
-        ]
-        update_data['status_history'] = existing_history + [
-            StatusHistoryEntry(status=new_status.value, by=admin.username).dict()
-        ]
+        update_data['status'] = new_status
+        push['status_history'] = asdict(StatusHistoryEntry(status=new_status, by=admin.username))
     
     # Track price changes
     if 'actual_cost' in update_data and update_data['actual_cost'] is not None:
-        # Convert existing entries to dicts if needed
-        existing_price_history = [
-            p.dict() if hasattr(p, 'dict') else p 
-            for p in pickup.price_history
-        ]
-        update_data['price_history'] = existing_price_history + [
-            PriceHistoryEntry(actual_cost=update_data['actual_cost'], by=admin.username).dict()
-        ]
+        push['price_history'] = asdict(PriceHistoryEntry(actual_cost=update_data['actual_cost'], by=admin.username))
     
     update_data['updated_at'] = datetime.utcnow()
+    ops = {'$set': update_data}
+    if push:
+        ops['$push'] = push
     
-    await db.pickup_requests.update_one(
+    updated = await db.pickup_requests.find_one_and_update(
         {'id': request_id},
-        {'$set': update_data}
+        ops,
+        return_document=ReturnDocument.AFTER
     )
-    
-    updated = await db.pickup_requests.find_one({'id': request_id})
-    return PickupRequest(**updated)
+    if not updated:
+        raise HTTPException(status_code=404, detail="Pickup request not found")
+    return updated
 
-@api_router.post("/pickup-requests/{request_id}/assign-driver", response_model=PickupRequest)
-async def assign_driver(
+@api_router.put("/pickup-requests/{request_id}", response_model=PickupRequest)
+async def update_pickup_request(
     request_id: str,
-    driver_id: str,
+    update: PickupRequestUpdate,
     admin: AdminUser = Depends(get_current_admin)
 ):
-    """Assign a driver to a pickup request"""
+    """Update a pickup request (admin only)"""
+    return PickupRequest(**await apply_pickup_update(request_id, update, admin))
+
+async def apply_driver_assignment(request_id: str, driver_id: str, admin: AdminUser) -> Dict:
+    """Assign an available driver to an approved request, returning the updated document"""
     # Verify pickup request exists and is approved
     pickup = await db.pickup_requests.find_one({'id': request_id})
     if not pickup:
         raise HTTPException(status_code=404, detail="Pickup request not found")
     
-    pickup_obj = PickupRequest(**pickup)
-    if pickup_obj.status != PickupStatus.APPROVED:
+    if pickup['status'] != _S_APPROVED:
         raise HTTPException(status_code=400, detail="Can only assign driver to approved requests")
     
     # Verify driver exists and is available
@@ -412,36 +619,60 @@ async def assign_driver(
     if not driver:
         raise HTTPException(status_code=404, detail="Driver not found")
     
-    driver_obj = Driver(**driver)
-    if driver_obj.status != DriverStatus.AVAILABLE:
+    if driver['status'] != _D_AVAILABLE:
         raise HTTPException(status_code=400, detail="Driver is not available")
     
-    # Update pickup request - convert existing entries to dicts if needed
-    existing_history = [
-        h.dict() if hasattr(h, 'dict') else h 
-        for h in pickup_obj.status_history
-    ]
-    new_status_history = existing_history + [
-        StatusHistoryEntry(status=PickupStatus.ASSIGNED.value, by=admin.username).dict()
-    ]
-    
-    await db.pickup_requests.update_one(
-        {'id': request_id},
-        {'$set': {
-            'driver_id': driver_id,
-            'status': PickupStatus.ASSIGNED.value,
-            'status_history': new_status_history,
-            'updated_at': datetime.utcnow()
-        }}
-    )
-    
-    # Update driver status to busy
-    await db.drivers.update_one(
-        {'id': driver_id},
-        {'$set': {'status': DriverStatus.BUSY.value}}
+    # Update pickup request and mark the driver busy concurrently
+    updated, _ = await asyncio.gather(
+        db.pickup_requests.find_one_and_update(
+            {'id': request_id},
+            {
+                '$set': {
+                    'driver_id': driver_id,
+                    'status': _S_ASSIGNED,
+                    'updated_at': datetime.utcnow()
+                },
+                '$push': {
+                    'status_history': asdict(StatusHistoryEntry(status=_S_ASSIGNED, by=admin.username))
+                }
+            },
+            return_document=ReturnDocument.AFTER
+        ),
+        db.drivers.update_one(
+            {'id': driver_id},
+            {'$set': {'status': _D_BUSY}}
+        )
     )
-    
-    updated = await db.pickup_requests.find_one({'id': request_id})
+    return updated
+
+@api_router.post("/pickup-requests/{request_id}/assign-driver", response_model=PickupRequest)
+async def assign_driver(
+    request_id: str,
+    driver_id: str,
+    admin: AdminUser = Depends(get_current_admin)
+):
+    """Assign a driver to a pickup request"""
+    return PickupRequest(**await apply_driver_assignment(request_id, driver_id, admin))
+
+@api_router.post("/pickup-requests/{request_id}/workflow", response_model=PickupRequest)
+async def run_pickup_workflow(
+    request_id: str,
+    workflow: WorkflowRequest,
+    admin: AdminUser = Depends(get_current_admin)
+):
+    """Apply an ordered list of status changes and driver assignments in one call (admin only)
+    
+    Transitions are applied in order and processing stops at the first one that fails;
+    transitions applied before it are kept.
+    """
+    updated = None
+    for transition in workflow.transitions:
+        if transition.assign_driver is not None:
+            updated = await apply_driver_assignment(request_id, transition.assign_driver, admin)
+        else:
+            updated = await apply_pickup_update(
+                request_id, PickupRequestUpdate(status=transition.status), admin
+            )
     return PickupRequest(**updated)
 
 # ============ DRIVER ROUTES ============
@@ -449,7 +680,10 @@ async def assign_driver(
 async def create_driver(driver: DriverCreate, admin: AdminUser = Depends(get_current_admin)):
     """Create a new driver (admin only)"""
     new_driver = Driver(**driver.dict())
-    await db.drivers.insert_one(new_driver.dict())
+    doc = new_driver.dict()
+    if new_driver.current_location:
+        doc['h3_r8'] = h3_cell(new_driver.current_location)
+    await db.drivers.insert_one(doc)
     logger.info(f"Created driver: {new_driver.id}")
     return new_driver
 
@@ -461,7 +695,37 @@ async def get_drivers(status: Optional[DriverStatus] = None):
         query['status'] = status.value
     
     drivers = await db.drivers.find(query).to_list(100)
-    return [Driver(**d) for d in drivers]
+    return ORJSONResponse(_DRIVER_LIST_ADAPTER.dump_python(
+        _DRIVER_LIST_ADAPTER.validate_python(drivers), mode='json'
+    ))
+
+@api_router.get("/drivers/nearby", response_model=List[NearbyDriver])
+async def get_nearby_drivers(latitude: float, longitude: float, limit: int = Query(10, ge=1, le=100)):
+    """Get available drivers ranked by distance from a location"""
+    query = {
+        'status': _D_AVAILABLE,
+        'current_location': {'$ne': None}
+    }
+    origin = h3.latlng_to_cell(latitude, longitude, H3_RESOLUTION)
+    cells = list(h3.grid_disk(origin, H3_SEARCH_RING))
+    # Rank whole result sets - truncating an unsorted cursor could drop the nearest drivers
+    drivers = await db.drivers.find({**query, 'h3_r8': {'$in': cells}}).to_list(None)
+    if len(drivers) < limit:
+        # Too few in the neighbouring cells to fill the page - fall back to a full scan
+        drivers = await db.drivers.find(query).to_list(None)
+    if not drivers:
+        return []
+
+    distances = haversine_vec(
+        [d['current_location']['latitude'] for d in drivers],
+        [d['current_location']['longitude'] for d in drivers],
+        latitude, longitude
+    )
+    ranked = distances.argsort()[:limit]
+    return [
+        NearbyDriver(**drivers[i], distance_km=round(float(distances[i]), 2))
+        for i in ranked
+    ]
 
 @api_router.get("/drivers/{driver_id}", response_model=Driver)
 async def get_driver(driver_id: str):
@@ -499,7 +763,7 @@ async def create_rating(rating: RatingCreate):
     if not pickup:
         raise HTTPException(status_code=404, detail="Pickup request not found")
     
-    if pickup['status'] != PickupStatus.COMPLETED.value:
+    if pickup['status'] != _S_COMPLETED:
         raise HTTPException(status_code=400, detail="Can only rate completed pickups")
     
     # Check if already rated
@@ -523,18 +787,56 @@ async def get_rating(pickup_id: str):
 @api_router.get("/stats")
 async def get_stats():
     """Get dashboard statistics"""
-    pending = await db.pickup_requests.count_documents({'status': PickupStatus.PENDING.value})
-    approved = await db.pickup_requests.count_documents({'status': PickupStatus.APPROVED.value})
-    assigned = await db.pickup_requests.count_documents({'status': PickupStatus.ASSIGNED.value})
-    completed = await db.pickup_requests.count_documents({'status': PickupStatus.COMPLETED.value})
-    
-    return {
-        'pending': pending,
-        'approved': approved,
-        'assigned': assigned,
-        'completed': completed,
-        'total': pending + approved + assigned + completed
+    pipeline = [{'$group': {'_id': '$status', 'n': {'$sum': 1}}}]
+    results = await db.pickup_requests.aggregate(pipeline).to_list(10)
+    counts = {r['_id']: r['n'] for r in results}
+    
+    stats = {s.value.lower(): counts.get(s.value, 0) for s in PickupStatus}
+    stats['total'] = sum(stats.values())
+    return stats
+
+def compute_pricing_stats(requests: List[Dict]) -> Dict:
+    """Per waste type totals of the batch pricing kernel over the given pickups"""
+    stats = {
+        w.value: {'count': 0, 'distance_km': 0.0, 'estimated_revenue': 0.0, 'revenue_per_km': 0.0}
+        for w in WasteType
     }
+    if not requests:
+        return stats
+    
+    widx = np.array([_WASTE_TYPE_INDEX[r['waste_type']] for r in requests], dtype=np.int64)
+    lats = np.array([r['location']['latitude'] for r in requests], dtype=np.float64)
+    lons = np.array([r['location']['longitude'] for r in requests], dtype=np.float64)
+    qidx = np.array([_QUANTITY_INDEX[r['quantity']] for r in requests], dtype=np.int64)
+    with _PRICING_KERNEL_LOCK:
+        distances, costs = batch_estimate(
+            lats, lons, qidx, widx,
+            SERVICE_CENTER_LAT, SERVICE_CENTER_LNG,
+            _VOLUME_FACTOR_ARRAY, _WASTE_SURCHARGE_ARRAY,
+            float(RATE_PER_KM), float(BASE_RATE)
+        )
+    
+    counts = np.bincount(widx, minlength=len(WasteType))
+    total_km = np.bincount(widx, weights=distances, minlength=len(WasteType))
+    total_cost = np.bincount(widx, weights=np.round(costs, 2), minlength=len(WasteType))
+    for i, w in enumerate(WasteType):
+        entry = stats[w.value]
+        entry['count'] = int(counts[i])
+        entry['distance_km'] = round(float(total_km[i]), 2)
+        entry['estimated_revenue'] = round(float(total_cost[i]), 2)
+        if total_km[i] > 0:
+            entry['revenue_per_km'] = round(float(total_cost[i] / total_km[i]), 2)
+    return stats
+
+@api_router.get("/stats/pricing")
+async def get_pricing_stats(admin: AdminUser = Depends(get_current_admin)):
+    """Recomputed estimates and revenue per km for each waste type (admin only)"""
+    requests = await db.pickup_requests.find(
+        {},
+        {'_id': 0, 'location.latitude': 1, 'location.longitude': 1, 'quantity': 1, 'waste_type': 1}
+    ).sort('created_at', -1).limit(PRICING_STATS_MAX_REQUESTS).to_list(PRICING_STATS_MAX_REQUESTS)
+    # The first call also pays the kernel's JIT compile, so keep it off the event loop
+    return await asyncio.to_thread(compute_pricing_stats, requests)
 
 # ============ PRICING PREVIEW ============
 @api_router.post("/calculate-cost")
@@ -545,17 +847,14 @@ async def calculate_cost_preview(
     waste_type: WasteType
 ):
     """Calculate estimated cost preview"""
-    distance_km = haversine_distance(
-        SERVICE_CENTER_LAT, SERVICE_CENTER_LNG,
-        latitude, longitude
-    )
-    
-    if distance_km > SERVICE_RADIUS_KM:
+    if fast_distance_km(latitude, longitude) > SERVICE_RADIUS_KM:
         return {
             'in_service_area': False,
             'message': "Currently we serve Siliguri city limits only."
         }
     
+    distance_km = haversine_from_center(latitude, longitude)
+    
     cost = calculate_cost(distance_km, quantity.value, waste_type.value)
     
     return {
@@ -588,12 +887,22 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_db_client():
     """Create indexes on startup"""
-    await db.pickup_requests.create_index('status')
-    await db.pickup_requests.create_index('created_at')
-    await db.pickup_requests.create_index('driver_id')
-    await db.drivers.create_index('status')
+    await asyncio.gather(
+        db.pickup_requests.create_index('status', background=True),
+        db.pickup_requests.create_index([('created_at', -1)], background=True),
+        db.pickup_requests.create_index([('status', 1), ('created_at', -1)], background=True),
+        db.pickup_requests.create_index('driver_id', background=True),
+        db.pickup_requests.create_index('h3_r8', background=True),
+        db.drivers.create_index('status', background=True),
+        db.drivers.create_index('h3_r8', background=True)
+    )
     logger.info("Database indexes created")
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+
+if __name__ == "__main__":
+    import uvicorn
+    # Equivalent CLI: uvicorn server:app --host 0.0.0.0 --port 8001 --loop uvloop --http httptools
+    uvicorn.run("server:app", host="0.0.0.0", port=8001, loop="uvloop", http="httptools")
@@ -0,0 +1,32 @@
+import math
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Calculate distance between two points in km using Haversine formula"""
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+
+    a = math.sin(delta_lat/2)**2 + math.cos(lat1_rad) * math.cos(lat2_rad) * math.sin(delta_lon/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+
+    return EARTH_RADIUS_KM * c
+
+
+def haversine_vec(lats, lons, lat0: float, lon0: float) -> np.ndarray:
+    """Distances in km from (lat0, lon0) to every point in the lats/lons arrays"""
+    lats = np.radians(np.asarray(lats, dtype=np.float64))
+    lons = np.radians(np.asarray(lons, dtype=np.float64))
+    lat0_rad = math.radians(lat0)
+    lon0_rad = math.radians(lon0)
+
+    dlat = lats - lat0_rad
+    dlon = lons - lon0_rad
+
+    a = np.sin(dlat * 0.5)**2 + math.cos(lat0_rad) * np.cos(lats) * np.sin(dlon * 0.5)**2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
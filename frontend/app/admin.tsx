@@ -160,6 +160,19 @@ export default function AdminScreen() {
     }
   };
 
+  const openRequest = async (req: PickupRequest) => {
+    setSelectedRequest(req);
+    setAdjustedCost(req.actual_cost?.toString() || '');
+
+    // List entries omit the image reference, so load the full request for the detail view
+    try {
+      const fullRequest = await pickupApi.getById(req.id);
+      setSelectedRequest((current) => (current?.id === fullRequest.id ? fullRequest : current));
+    } catch (error) {
+      console.error('Request fetch error:', error);
+    }
+  };
+
   const handleApprove = async () => {
     if (!selectedRequest) return;
 
@@ -427,10 +440,7 @@ export default function AdminScreen() {
                 <TouchableOpacity
                   key={req.id}
                   style={[styles.requestCard, Shadows.elevation2]}
-                  onPress={() => {
-                    setSelectedRequest(req);
-                    setAdjustedCost(req.actual_cost?.toString() || '');
-                  }}
+                  onPress={() => openRequest(req)}
                 >
                   <View style={styles.requestHeader}>
                     <View style={[styles.statusBadge, { backgroundColor: StatusColors[req.status] }]}>
@@ -589,8 +599,8 @@ export default function AdminScreen() {
                 </View>
 
                 {/* Waste Image */}
-                {selectedRequest.waste_image && (
-                  <Image source={{ uri: selectedRequest.waste_image }} style={styles.detailImage} />
+                {selectedRequest.has_image && (
+                  <Image source={{ uri: pickupApi.imageUrl(selectedRequest.id) }} style={styles.detailImage} />
                 )}
 
                 {/* Info */}
@@ -225,13 +225,14 @@ export default function RequestScreen() {
     try {
       setIsSubmitting(true);
 
+      const wasteImageId = await pickupApi.uploadImage(wasteImage);
       const request = await pickupApi.create({
         location: {
           latitude: pickupLocation.latitude,
           longitude: pickupLocation.longitude,
           address: manualAddress || pickupLocation.address,
         },
-        waste_image: wasteImage,
+        waste_image_id: wasteImageId,
         waste_type: wasteType,
         quantity: quantity,
         user_contact: userContact || undefined,
@@ -236,10 +236,10 @@ export default function TrackScreen() {
                 </Text>
               </View>
 
-              {request.waste_image && (
+              {request.has_image && (
                 <View style={styles.imageSection}>
                   <Text style={styles.infoLabel}>Waste Photo</Text>
-                  <Image source={{ uri: request.waste_image }} style={styles.wasteImage} />
+                  <Image source={{ uri: pickupApi.imageUrl(request.id) }} style={styles.wasteImage} />
                 </View>
               )}
 
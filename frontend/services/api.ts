@@ -1,4 +1,5 @@
 import axios from 'axios';
+import { Platform } from 'react-native';
 import Constants from 'expo-constants';
 import AsyncStorage from '@react-native-async-storage/async-storage';
 
@@ -30,7 +31,8 @@ export interface Location {
 export interface PickupRequest {
   id: string;
   location: Location;
-  waste_image: string;
+  waste_image_id?: string | null; // only present when fetched by id
+  has_image?: boolean; // only present when fetched by id
   waste_type: string;
   quantity: string;
   estimated_cost: number;
@@ -86,9 +88,23 @@ export const authApi = {
 
 // Pickup Requests API
 export const pickupApi = {
+  uploadImage: async (imageUri: string) => {
+    const form = new FormData();
+    if (Platform.OS === 'web') {
+      const blob = await (await fetch(imageUri)).blob();
+      form.append('file', blob, 'waste.jpg');
+    } else {
+      form.append('file', { uri: imageUri, name: 'waste.jpg', type: 'image/jpeg' } as any);
+    }
+    const response = await api.post('/pickup-requests/image', form, {
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+    return response.data.file_id as string;
+  },
+  imageUrl: (id: string) => `${BASE_URL}/api/pickup-requests/${id}/image`,
   create: async (data: {
     location: Location;
-    waste_image: string;
+    waste_image_id: string;
     waste_type: string;
     quantity: string;
     user_contact?: string;
@@ -0,0 +1,40 @@
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'backend'))
+# The Motor client is created at import time but never connects here
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+
+import server  # noqa: E402
+from pricing_kernel import batch_estimate  # noqa: E402
+
+
+def test_batch_estimate_matches_scalar_pricing():
+    points = [(26.7271, 88.3953), (26.73, 88.40), (26.85, 88.30), (26.60, 88.52)]
+    rows = [
+        (lat, lon, q, w)
+        for lat, lon in points
+        for q in server.Quantity
+        for w in server.WasteType
+    ]
+
+    distances, costs = batch_estimate(
+        np.array([r[0] for r in rows], dtype=np.float64),
+        np.array([r[1] for r in rows], dtype=np.float64),
+        np.array([server._QUANTITY_INDEX[r[2].value] for r in rows], dtype=np.int64),
+        np.array([server._WASTE_TYPE_INDEX[r[3].value] for r in rows], dtype=np.int64),
+        server.SERVICE_CENTER_LAT, server.SERVICE_CENTER_LNG,
+        server._VOLUME_FACTOR_ARRAY, server._WASTE_SURCHARGE_ARRAY,
+        float(server.RATE_PER_KM), float(server.BASE_RATE)
+    )
+
+    for i, (lat, lon, quantity, waste_type) in enumerate(rows):
+        expected_km = server.haversine_from_center(lat, lon)
+        assert distances[i] == pytest.approx(expected_km, abs=1e-9)
+        assert costs[i] == pytest.approx(
+            server.calculate_cost(expected_km, quantity.value, waste_type.value), abs=0.005
+        )